@@ -6,7 +6,9 @@ voice/conversation services.
 
 from __future__ import annotations
 
+from functools import lru_cache
 import logging
+from urllib.parse import urlparse
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
@@ -48,20 +50,30 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             server_url=entry.data.get("tunnel_url", f"wss://tun.{_get_domain(entry)}/ws/tunnel"),
             token=entry.data["api_token"],
             local_port=entry.data.get("local_port", 8123),
+            pipeline_frames=entry.options.get("tunnel_pipelining", False),
         )
         hass.data[DOMAIN][entry.entry_id]["tunnel"] = tunnel
 
-        # Run tunnel in background
+        # Run tunnel in background; as a background task it connects while
+        # the platforms below are set up and does not hold up HA startup
         entry.async_on_unload(tunnel.stop)
-        hass.async_create_task(tunnel.connect())
+        entry.async_create_background_task(hass, tunnel.connect(), "jetassist_tunnel")
         _LOGGER.info("JetAssist tunnel started")
 
+    # Apply changed options by reloading the entry
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+
     # Forward to platforms
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     _LOGGER.info("JetAssist integration set up successfully")
     return True
 
 
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload JetAssist after its options changed."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload JetAssist config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
@@ -78,16 +90,20 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
 def _get_domain(entry: ConfigEntry) -> str:
     """Extract domain from endpoint URL."""
-    endpoint = entry.data.get("endpoint", "https://api.jethome.cloud")
+    return _domain_from_endpoint(entry.data.get("endpoint", "https://api.jethome.cloud"))
+
+
+@lru_cache
+def _domain_from_endpoint(endpoint: str) -> str:
+    """Strip scheme, path, port and the first subdomain label from an endpoint."""
     # https://api.jethome.cloud -> jethome.cloud
     try:
-        from urllib.parse import urlparse
-
-        parsed = urlparse(endpoint)
-        host = parsed.hostname or "jethome.cloud"
-        parts = host.split(".")
-        if len(parts) > 2:
-            return ".".join(parts[1:])
-        return host
-    except Exception:
+        host = urlparse(endpoint).hostname
+    except ValueError:
+        # Malformed endpoint, e.g. an unclosed IPv6 bracket
+        host = None
+    if not host:
         return "jethome.cloud"
+    if host.count(".") > 1:
+        return host.split(".", 1)[1]
+    return host
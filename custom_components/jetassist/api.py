@@ -2,13 +2,50 @@
 
 from __future__ import annotations
 
+import asyncio
+from dataclasses import dataclass, field
 import logging
+import time
 from typing import Any
 
 import aiohttp
+from homeassistant.helpers.json import json_dumps
+from homeassistant.util.json import json_loads
+from multidict import CIMultiDict, CIMultiDictProxy
 
 _LOGGER = logging.getLogger(__name__)
 
+BACKUPS_CACHE_TTL = 30.0
+
+
+class MalformedResponseError(ValueError):
+    """Backend reply does not have the expected shape."""
+
+
+def _expect_dict(data: Any) -> dict[str, Any]:
+    """Return a decoded JSON reply that must be an object."""
+    if not isinstance(data, dict):
+        raise MalformedResponseError(f"Expected a JSON object, got {type(data).__name__}")
+    return data
+
+
+@dataclass(slots=True, frozen=True)
+class PresignResponse:
+    """Presigned S3 request returned by the backend."""
+
+    url: str
+    headers: dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_json(cls, data: dict[str, Any]) -> PresignResponse:
+        """Build from a decoded presign response."""
+        data = _expect_dict(data)
+        url = data.get("url")
+        headers = data.get("headers") or {}
+        if not isinstance(url, str) or not isinstance(headers, dict):
+            raise MalformedResponseError("Malformed presign response")
+        return cls(url=url, headers=headers)
+
 
 class JetHomeCloudAPI:
     """Async client to JetAssist backend."""
@@ -22,16 +59,27 @@ class JetHomeCloudAPI:
         self.endpoint = endpoint.rstrip("/")
         self.token = token
         self._session = session
-        self._headers = {
-            "Authorization": f"Bearer {token}",
-            "User-Agent": "JetHomeCloud-HA/0.1.0",
-        }
+        # Built once as an immutable CIMultiDict so aiohttp does not have to
+        # convert a plain dict on every request
+        self._headers = CIMultiDictProxy(
+            CIMultiDict(
+                {
+                    "Authorization": f"Bearer {token}",
+                    "User-Agent": "JetHomeCloud-HA/0.1.0",
+                }
+            )
+        )
+        self._backups_cache: tuple[float, list[dict[str, Any]]] | None = None
+        self._backups_lock = asyncio.Lock()
+        # Bumped on invalidation so an in-flight fetch does not store its
+        # now outdated list
+        self._backups_generation = 0
 
     @property
     def session(self) -> aiohttp.ClientSession:
         """Get or create aiohttp session."""
         if self._session is None:
-            self._session = aiohttp.ClientSession()
+            self._session = aiohttp.ClientSession(json_serialize=json_dumps)
         return self._session
 
     async def ping(self) -> bool:
@@ -43,7 +91,7 @@ class JetHomeCloudAPI:
                 timeout=aiohttp.ClientTimeout(total=10),
             ) as resp:
                 return resp.status == 200
-        except Exception as exc:
+        except (aiohttp.ClientError, TimeoutError) as exc:
             _LOGGER.debug("Ping failed: %s", exc)
             return False
 
@@ -52,37 +100,115 @@ class JetHomeCloudAPI:
         filename: str,
         size: int,
         md5: str | None = None,
-    ) -> dict[str, Any]:
-        """Get presigned URL for backup upload."""
+        crc32: str | None = None,
+    ) -> PresignResponse:
+        """Get presigned URL for backup upload.
+
+        The checksum is base64 encoded. The returned headers carry the
+        matching Content-MD5 or x-amz-checksum-crc32 header.
+        """
+        payload: dict[str, Any] = {"filename": filename, "size": size, "md5": md5}
+        if crc32 is not None:
+            payload["crc32"] = crc32
         async with self.session.post(
             f"{self.endpoint}/api/v1/backups/presign-upload",
             headers=self._headers,
-            json={"filename": filename, "size": size, "md5": md5},
+            json=payload,
         ) as resp:
             resp.raise_for_status()
-            data: dict[str, Any] = await resp.json()
-            return data
+            return PresignResponse.from_json(await resp.json(loads=json_loads))
 
-    async def presign_download(self, backup_id: str) -> dict[str, Any]:
-        """Get presigned URL for backup download."""
+    async def presign_multipart_create(
+        self,
+        filename: str,
+        size: int,
+        part_size: int,
+    ) -> str:
+        """Start a multipart backup upload and return its upload id."""
         async with self.session.post(
-            f"{self.endpoint}/api/v1/backups/{backup_id}/presign-download",
+            f"{self.endpoint}/api/v1/backups/multipart",
             headers=self._headers,
+            json={"filename": filename, "size": size, "part_size": part_size},
         ) as resp:
             resp.raise_for_status()
-            data: dict[str, Any] = await resp.json()
-            return data
+            upload_id = _expect_dict(await resp.json(loads=json_loads)).get("upload_id")
+            if not isinstance(upload_id, str):
+                raise MalformedResponseError("Malformed multipart upload response")
+            return upload_id
 
-    async def list_backups(self) -> list[dict[str, Any]]:
-        """List all cloud backups."""
-        async with self.session.get(
-            f"{self.endpoint}/api/v1/backups",
+    async def presign_multipart_part(
+        self,
+        upload_id: str,
+        part_number: int,
+        md5: str | None = None,
+    ) -> PresignResponse:
+        """Get presigned URL for one part of a multipart upload."""
+        async with self.session.post(
+            f"{self.endpoint}/api/v1/backups/multipart/{upload_id}/presign-part",
             headers=self._headers,
+            json={"part_number": part_number, "md5": md5},
         ) as resp:
             resp.raise_for_status()
-            data: list[dict[str, Any]] = await resp.json()
+            return PresignResponse.from_json(await resp.json(loads=json_loads))
+
+    async def presign_multipart_complete(
+        self,
+        upload_id: str,
+        parts: list[dict[str, Any]],
+    ) -> None:
+        """Complete a multipart upload from the uploaded part ETags."""
+        async with self.session.post(
+            f"{self.endpoint}/api/v1/backups/multipart/{upload_id}/complete",
+            headers=self._headers,
+            json={"parts": parts},
+        ) as resp:
+            resp.raise_for_status()
+
+    async def abort_multipart_upload(self, upload_id: str) -> None:
+        """Abort a multipart upload and drop its uploaded parts."""
+        async with self.session.delete(
+            f"{self.endpoint}/api/v1/backups/multipart/{upload_id}",
+            headers=self._headers,
+        ) as resp:
+            resp.raise_for_status()
+
+    async def presign_download(self, backup_id: str) -> PresignResponse:
+        """Get presigned URL for backup download."""
+        async with self.session.post(
+            f"{self.endpoint}/api/v1/backups/{backup_id}/presign-download",
+            headers=self._headers,
+        ) as resp:
+            resp.raise_for_status()
+            return PresignResponse.from_json(await resp.json(loads=json_loads))
+
+    async def list_backups(self) -> list[dict[str, Any]]:
+        """List all cloud backups.
+
+        The result is cached for BACKUPS_CACHE_TTL seconds and concurrent
+        callers share a single in-flight request.
+        """
+        async with self._backups_lock:
+            cache = self._backups_cache
+            if cache is not None and time.monotonic() - cache[0] < BACKUPS_CACHE_TTL:
+                return cache[1]
+            generation = self._backups_generation
+            async with self.session.get(
+                f"{self.endpoint}/api/v1/backups",
+                headers=self._headers,
+            ) as resp:
+                resp.raise_for_status()
+                data = await resp.json(loads=json_loads)
+            if not isinstance(data, list):
+                raise MalformedResponseError(f"Expected a JSON list, got {type(data).__name__}")
+            if generation == self._backups_generation:
+                self._backups_cache = (time.monotonic(), data)
             return data
 
+    def invalidate_backups_cache(self) -> None:
+        """Drop the cached backup list after backups were added or removed."""
+        self._backups_cache = None
+        self._backups_generation += 1
+
     async def delete_backup(self, backup_id: str) -> None:
         """Delete a backup."""
         async with self.session.delete(
@@ -98,5 +224,4 @@ class JetHomeCloudAPI:
             headers=self._headers,
         ) as resp:
             resp.raise_for_status()
-            data: dict[str, Any] = await resp.json()
-            return data
+            return _expect_dict(await resp.json(loads=json_loads))
@@ -6,11 +6,14 @@ Uses presigned S3 URLs for direct upload/download.
 
 from __future__ import annotations
 
+import asyncio
 import base64
 from collections.abc import AsyncIterator, Callable, Coroutine
 import hashlib
 import logging
+from tempfile import SpooledTemporaryFile
 from typing import Any
+import zlib
 
 import aiohttp
 from homeassistant.components.backup import BackupAgent, BackupAgentError
@@ -20,6 +23,67 @@ from .const import DOMAIN
 
 _LOGGER = logging.getLogger(__name__)
 
+# Backups up to this size are spooled in memory, larger ones roll over to disk
+SPOOL_MAX_SIZE = 64 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Backups larger than one part are uploaded as S3 multipart upload when the
+# backend advertises it (backup.multipart in providers)
+MULTIPART_PART_SIZE = 16 * 1024 * 1024
+MULTIPART_CONCURRENCY = 4
+MULTIPART_RETRIES = 5
+MULTIPART_PART_TIMEOUT = 600
+
+# Network failures and malformed responses from the JetAssist API; the API
+# client raises ValueError (MalformedResponseError) for undecodable or
+# wrongly shaped replies
+API_ERRORS = (aiohttp.ClientError, TimeoutError, ValueError)
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+DOWNLOAD_PREFETCH = 8
+
+
+class _Crc32:
+    """Incremental CRC32 with the hashlib update/digest interface."""
+
+    __slots__ = ("_value",)
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self._value = 0
+
+    def update(self, data: bytes) -> None:
+        """Feed data into the checksum."""
+        self._value = zlib.crc32(data, self._value)
+
+    def digest(self) -> bytes:
+        """Return the big-endian checksum, as S3 expects it."""
+        return self._value.to_bytes(4, "big")
+
+
+def _spool_chunk(spool: SpooledTemporaryFile[bytes], checksum: hashlib._Hash | _Crc32, chunk: bytes) -> None:
+    """Hash and spool a backup chunk (runs in the executor)."""
+    checksum.update(chunk)
+    spool.write(chunk)
+
+
+def _md5_b64(data: bytes) -> str:
+    """Return the base64 MD5 digest of data (runs in the executor)."""
+    return base64.b64encode(hashlib.md5(data).digest()).decode()  # noqa: S324
+
+
+async def _iter_parts(stream: AsyncIterator[bytes], part_size: int) -> AsyncIterator[bytes]:
+    """Regroup a backup stream into parts of part_size bytes (last one may be shorter)."""
+    buffer = bytearray()
+    async for chunk in stream:
+        buffer += chunk
+        while len(buffer) >= part_size:
+            # A single copy; slicing the bytearray itself would copy twice
+            yield bytes(memoryview(buffer)[:part_size])
+            del buffer[:part_size]
+    if buffer:
+        yield bytes(buffer)
+
 
 async def async_get_backup_agents(
     hass: HomeAssistant,
@@ -30,7 +94,7 @@ async def async_get_backup_agents(
     for entry_id, data in hass.data.get(DOMAIN, {}).items():
         api = data.get("api")
         if api:
-            agents.append(JetHomeCloudBackupAgent(entry_id, api))
+            agents.append(JetHomeCloudBackupAgent(hass, entry_id, api))
     return agents
 
 
@@ -40,11 +104,13 @@ class JetHomeCloudBackupAgent(BackupAgent):
     domain = DOMAIN
     name = "JetAssist"
 
-    def __init__(self, entry_id: str, api: Any) -> None:
+    def __init__(self, hass: HomeAssistant, entry_id: str, api: Any) -> None:
         """Initialize."""
         super().__init__()
+        self._hass = hass
         self._entry_id = entry_id
         self._api = api
+        self._backup_features: dict[str, Any] | None = None
 
     @callback
     def async_get_unique_id(self) -> str:
@@ -60,53 +126,180 @@ class JetHomeCloudBackupAgent(BackupAgent):
         size: int,
         **kwargs: Any,
     ) -> None:
-        """Upload a backup to JetAssist via presigned S3 URL."""
+        """Upload a backup to JetAssist via presigned S3 URLs."""
         _LOGGER.info("Uploading backup %s (%s, %d bytes)", backup_id, filename, size)
 
-        # Calculate MD5
-        md5_hash = hashlib.md5()  # noqa: S324
-        stream = await open_stream()
-        async for chunk in stream:
-            md5_hash.update(chunk)
-        md5_b64 = base64.b64encode(md5_hash.digest()).decode()
+        if size > MULTIPART_PART_SIZE and await self._async_supports_multipart():
+            await self._async_upload_multipart(open_stream, filename, size)
+        else:
+            await self._async_upload_single(open_stream, filename, size)
+        self._api.invalidate_backups_cache()
+
+        _LOGGER.info("Backup %s uploaded successfully", backup_id)
+
+    async def _async_upload_single(
+        self,
+        open_stream: Callable[[], Coroutine[Any, Any, AsyncIterator[bytes]]],
+        filename: str,
+        size: int,
+    ) -> None:
+        """Upload a small backup with a single PUT."""
+        use_crc32 = await self._async_supports_crc32()
+        with SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as spool:
+            # Calculate the checksum in a single pass over the backup, spooling
+            # it so the upload does not have to read the backup a second time
+            checksum = _Crc32() if use_crc32 else hashlib.md5()  # noqa: S324
+            stream = await open_stream()
+            async for chunk in stream:
+                await self._hass.async_add_executor_job(_spool_chunk, spool, checksum, chunk)
+            checksum_b64 = base64.b64encode(checksum.digest()).decode()
+
+            # Get presigned URL
+            try:
+                if use_crc32:
+                    presign = await self._api.presign_upload(filename=filename, size=size, crc32=checksum_b64)
+                else:
+                    presign = await self._api.presign_upload(filename=filename, size=size, md5=checksum_b64)
+            except API_ERRORS as exc:
+                raise BackupAgentError(f"Failed to get upload URL: {exc}") from exc
 
-        # Get presigned URL
+            # Upload directly to S3
+            try:
+                await self._hass.async_add_executor_job(spool.seek, 0)
+                async with self._api.session.put(
+                    presign.url,
+                    headers=presign.headers,
+                    data=self._iter_spool(spool),
+                    timeout=aiohttp.ClientTimeout(total=43200),
+                ) as resp:
+                    if resp.status >= 400:
+                        text = await resp.text()
+                        raise BackupAgentError(f"Upload failed: {resp.status} {text[:200]}")
+            except (aiohttp.ClientError, OSError) as exc:
+                raise BackupAgentError(f"Upload error: {exc}") from exc
+
+    async def _async_get_backup_features(self) -> dict[str, Any]:
+        """Return the backup features the backend advertises in its providers."""
+        if self._backup_features is None:
+            try:
+                providers = await self._api.get_providers()
+            except API_ERRORS as exc:
+                _LOGGER.debug("Cannot get backup features, using single MD5 uploads: %s", exc)
+                return {}
+            features = providers.get("backup")
+            self._backup_features = features if isinstance(features, dict) else {}
+        return self._backup_features
+
+    async def _async_supports_crc32(self) -> bool:
+        """Return whether the backend signs S3 uploads with a CRC32 checksum.
+
+        CRC32 is far cheaper to compute than MD5; backends that do not
+        advertise it keep getting Content-MD5.
+        """
+        checksums = (await self._async_get_backup_features()).get("checksums")
+        return isinstance(checksums, list) and "crc32" in checksums
+
+    async def _async_supports_multipart(self) -> bool:
+        """Return whether the backend has the multipart upload endpoints.
+
+        Backends that do not advertise them keep getting a single PUT.
+        """
+        features = await self._async_get_backup_features()
+        return bool(features.get("multipart", False))
+
+    async def _async_upload_multipart(
+        self,
+        open_stream: Callable[[], Coroutine[Any, Any, AsyncIterator[bytes]]],
+        filename: str,
+        size: int,
+    ) -> None:
+        """Upload a large backup as S3 multipart upload with parallel parts."""
         try:
-            presign = await self._api.presign_upload(
+            upload_id = await self._api.presign_multipart_create(
                 filename=filename,
                 size=size,
-                md5=md5_b64,
+                part_size=MULTIPART_PART_SIZE,
             )
-        except Exception as exc:
-            raise BackupAgentError(f"Failed to get upload URL: {exc}") from exc
+        except API_ERRORS as exc:
+            raise BackupAgentError(f"Failed to start multipart upload: {exc}") from exc
 
-        # Upload directly to S3
+        # Parts are read while earlier ones are in flight; the semaphore
+        # bounds how many parts are buffered in memory at once
+        semaphore = asyncio.Semaphore(MULTIPART_CONCURRENCY)
+        etags: dict[int, str] = {}
         try:
-            stream = await open_stream()
-            async with (
-                aiohttp.ClientSession() as session,
-                session.put(
-                    presign["url"],
-                    headers=presign.get("headers", {}),
-                    data=stream,
-                    timeout=aiohttp.ClientTimeout(total=43200),
-                ) as resp,
-            ):
-                if resp.status >= 400:
-                    text = await resp.text()
-                    raise BackupAgentError(f"Upload failed: {resp.status} {text[:200]}")
-        except BackupAgentError:
-            raise
-        except Exception as exc:
+            async with asyncio.TaskGroup() as group:
+                part_number = 0
+                async for part in _iter_parts(await open_stream(), MULTIPART_PART_SIZE):
+                    await semaphore.acquire()
+                    part_number += 1
+                    task = group.create_task(self._async_upload_part(upload_id, part_number, part, etags))
+                    task.add_done_callback(lambda _: semaphore.release())
+
+            await self._api.presign_multipart_complete(
+                upload_id,
+                [{"part_number": number, "etag": etags[number]} for number in sorted(etags)],
+            )
+        except ExceptionGroup as err:
+            await self._async_abort_multipart(upload_id)
+            raise BackupAgentError(f"Upload error: {err.exceptions[0]}") from err
+        except (*API_ERRORS, OSError) as exc:
+            await self._async_abort_multipart(upload_id)
             raise BackupAgentError(f"Upload error: {exc}") from exc
+        except asyncio.CancelledError:
+            # Backup cancelled in HA; do not leave the uploaded parts behind
+            await asyncio.shield(self._async_abort_multipart(upload_id))
+            raise
 
-        _LOGGER.info("Backup %s uploaded successfully", backup_id)
+    async def _async_abort_multipart(self, upload_id: str) -> None:
+        """Abort a failed multipart upload so its parts are not kept."""
+        try:
+            await self._api.abort_multipart_upload(upload_id)
+        except API_ERRORS as exc:
+            _LOGGER.warning("Failed to abort multipart upload %s: %s", upload_id, exc)
+
+    async def _async_upload_part(
+        self,
+        upload_id: str,
+        part_number: int,
+        data: bytes,
+        etags: dict[int, str],
+    ) -> None:
+        """Upload one part, retrying it on its own with exponential backoff."""
+        md5_b64 = await self._hass.async_add_executor_job(_md5_b64, data)
+        for attempt in range(MULTIPART_RETRIES):
+            try:
+                presign = await self._api.presign_multipart_part(upload_id, part_number, md5_b64)
+                async with self._api.session.put(
+                    presign.url,
+                    headers=presign.headers,
+                    data=data,
+                    timeout=aiohttp.ClientTimeout(total=MULTIPART_PART_TIMEOUT),
+                ) as resp:
+                    if resp.status >= 400:
+                        text = await resp.text()
+                        raise BackupAgentError(f"{resp.status} {text[:200]}")
+                    if (etag := resp.headers.get("ETag")) is None:
+                        raise BackupAgentError("No ETag in response")
+                    etags[part_number] = etag
+                    return
+            except (aiohttp.ClientError, TimeoutError, BackupAgentError) as exc:
+                if attempt + 1 == MULTIPART_RETRIES:
+                    raise BackupAgentError(f"Upload of part {part_number} failed: {exc}") from exc
+                delay = 2**attempt
+                _LOGGER.debug("Upload of part %d failed: %s, retrying in %ds", part_number, exc, delay)
+                await asyncio.sleep(delay)
+
+    async def _iter_spool(self, spool: SpooledTemporaryFile[bytes]) -> AsyncIterator[bytes]:
+        """Read a spooled backup back in chunks without blocking the event loop."""
+        while chunk := await self._hass.async_add_executor_job(spool.read, UPLOAD_CHUNK_SIZE):
+            yield chunk
 
     async def async_list_backups(self, **kwargs: Any) -> list[dict[str, Any]]:
         """List available backups."""
         try:
             return await self._api.list_backups()
-        except Exception as exc:
+        except API_ERRORS as exc:
             _LOGGER.error("Failed to list backups: %s", exc)
             return []
 
@@ -119,20 +312,36 @@ class JetHomeCloudBackupAgent(BackupAgent):
         _LOGGER.info("Downloading backup %s", backup_id)
         try:
             presign = await self._api.presign_download(backup_id)
-        except Exception as exc:
+        except API_ERRORS as exc:
             raise BackupAgentError(f"Failed to get download URL: {exc}") from exc
 
-        async def _stream() -> AsyncIterator[bytes]:
-            async with (
-                aiohttp.ClientSession() as session,
-                session.get(
-                    presign["url"],
+        # The network side runs ahead of the consumer by up to
+        # DOWNLOAD_PREFETCH chunks, so receiving overlaps with HA writing
+        queue: asyncio.Queue[bytes | Exception | None] = asyncio.Queue(maxsize=DOWNLOAD_PREFETCH)
+
+        async def _produce() -> None:
+            try:
+                async with self._api.session.get(
+                    presign.url,
                     timeout=aiohttp.ClientTimeout(total=43200),
-                ) as resp,
-            ):
-                resp.raise_for_status()
-                async for chunk in resp.content.iter_chunked(65536):
-                    yield chunk
+                ) as resp:
+                    resp.raise_for_status()
+                    async for chunk in resp.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                        await queue.put(chunk)
+            except Exception as exc:  # noqa: BLE001 - re-raised by the consumer
+                await queue.put(exc)
+                return
+            await queue.put(None)
+
+        async def _stream() -> AsyncIterator[bytes]:
+            producer = asyncio.create_task(_produce())
+            try:
+                while (item := await queue.get()) is not None:
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+            finally:
+                producer.cancel()
 
         return _stream()
 
@@ -141,5 +350,7 @@ class JetHomeCloudBackupAgent(BackupAgent):
         _LOGGER.info("Deleting backup %s", backup_id)
         try:
             await self._api.delete_backup(backup_id)
-        except Exception as exc:
+        except API_ERRORS as exc:
             raise BackupAgentError(f"Failed to delete backup: {exc}") from exc
+        finally:
+            self._api.invalidate_backups_cache()
@@ -13,6 +13,7 @@ from typing import Any
 import aiohttp
 from homeassistant.config_entries import ConfigFlow, OptionsFlow
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 import voluptuous as vol
 
 from .api import JetHomeCloudAPI
@@ -65,6 +66,7 @@ class JetHomeCloudConfigFlow(ConfigFlow, domain=DOMAIN):
             api = JetHomeCloudAPI(
                 endpoint=endpoint,
                 token=user_input["api_token"],
+                session=async_get_clientsession(self.hass),
             )
             try:
                 if await api.ping():
@@ -124,6 +126,10 @@ class JetHomeCloudOptionsFlow(OptionsFlow):
                         "tunnel_enabled",
                         default=self.config_entry.data.get("tunnel_enabled", True),
                     ): bool,
+                    vol.Optional(
+                        "tunnel_pipelining",
+                        default=self.config_entry.options.get("tunnel_pipelining", False),
+                    ): bool,
                 }
             ),
         )
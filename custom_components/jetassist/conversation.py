@@ -6,19 +6,31 @@ Supports function calling for HA service calls.
 
 from __future__ import annotations
 
-import json
 import logging
 from typing import Any
 
+import aiohttp
 from homeassistant.components.conversation import (
+    DOMAIN as CONVERSATION_DOMAIN,
     AbstractConversationAgent,
     ConversationInput,
     ConversationResult,
 )
+from homeassistant.components.homeassistant.exposed_entities import (
+    async_listen_entity_updates,
+    async_should_expose,
+)
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import intent
+from homeassistant.helpers.json import json_bytes
+from homeassistant.util.json import json_loads
+from multidict import CIMultiDict, CIMultiDictProxy
+import voluptuous as vol
 
+from .api import MalformedResponseError
 from .const import DOMAIN
 
 _LOGGER = logging.getLogger(__name__)
@@ -44,6 +56,32 @@ HA_TOOLS = [
     },
 ]
 
+# Static part of the chat completion request, serialized once at import;
+# only the messages are encoded per turn
+_CHAT_BODY_PREFIX = b'{"tools":' + json_bytes(HA_TOOLS) + b',"temperature":0.7,"max_tokens":1024,"messages":'
+
+# Arguments of a call_ha_service tool call
+_SERVICE_CALL_SCHEMA = vol.Schema(
+    {
+        vol.Required("domain"): str,
+        vol.Required("service"): str,
+        vol.Required("entity_id"): str,
+        vol.Optional("data", default={}): dict,
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
+
+def _reply_message(data: Any) -> dict[str, Any]:
+    """Return the message of the first choice of a chat completion reply."""
+    if isinstance(data, dict):
+        choices = data.get("choices", [{}])
+        if isinstance(choices, list) and choices and isinstance(choices[0], dict):
+            message = choices[0].get("message", {})
+            if isinstance(message, dict):
+                return message
+    raise MalformedResponseError("Malformed chat completion reply")
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -52,6 +90,9 @@ async def async_setup_entry(
     """Set up conversation agent."""
     api = hass.data[DOMAIN][entry.entry_id]["api"]
     agent = JetHomeCloudConversationAgent(hass, api, entry.entry_id)
+    # Rebuild the cached system prompt only after prompt entities or exposure change
+    entry.async_on_unload(hass.bus.async_listen(EVENT_STATE_CHANGED, agent.async_state_changed))
+    entry.async_on_unload(async_listen_entity_updates(hass, CONVERSATION_DOMAIN, agent.async_invalidate_prompt))
     # Register the agent -- the actual registration depends on HA version
     hass.data[DOMAIN][entry.entry_id]["conversation_agent"] = agent
 
@@ -59,11 +100,27 @@ async def async_setup_entry(
 class JetHomeCloudConversationAgent(AbstractConversationAgent):
     """JetAssist LLM as HA Conversation Agent."""
 
+    _PROMPT_PREFIX = (
+        "You are a helpful smart home assistant powered by JetAssist.\n"
+        "You help the user control their Home Assistant devices.\n\n"
+        "Available devices:\n"
+    )
+    _PROMPT_SUFFIX = (
+        "\n\nWhen controlling devices, use the call_ha_service function.\nRespond in the user's language. Be concise."
+    )
+
     def __init__(self, hass: HomeAssistant, api: Any, entry_id: str) -> None:
         """Initialize."""
         self.hass = hass
         self._api = api
         self._entry_id = entry_id
+        headers = CIMultiDict(api._headers)
+        headers[aiohttp.hdrs.CONTENT_TYPE] = "application/json"
+        self._chat_headers = CIMultiDictProxy(headers)
+        self._cached_prompt: str | None = None
+        # Rendered prompt line per entity in the cached prompt, dropped when
+        # its state changes
+        self._entity_lines: dict[str, str] = {}
 
     @property
     def supported_languages(self) -> list[str]:
@@ -74,31 +131,20 @@ class JetHomeCloudConversationAgent(AbstractConversationAgent):
         """Process a conversation turn."""
         try:
             # Build messages with device context
-            exposed_entities = self._get_exposed_entities()
             messages = [
                 {
                     "role": "system",
-                    "content": self._build_system_prompt(exposed_entities),
+                    "content": self._get_system_prompt(),
                 },
                 {"role": "user", "content": user_input.text},
             ]
 
             # Send to cloud LLM
-            import aiohttp
-
-            async with (
-                aiohttp.ClientSession() as session,
-                session.post(
-                    f"{self._api.endpoint}/api/v1/chat/completions",
-                    headers=self._api._headers,
-                    json={
-                        "messages": messages,
-                        "tools": HA_TOOLS,
-                        "temperature": 0.7,
-                        "max_tokens": 1024,
-                    },
-                ) as resp,
-            ):
+            async with self._api.session.post(
+                f"{self._api.endpoint}/api/v1/chat/completions",
+                headers=self._chat_headers,
+                data=_CHAT_BODY_PREFIX + json_bytes(messages) + b"}",
+            ) as resp:
                 if resp.status != 200:
                     error = await resp.text()
                     _LOGGER.error("LLM API error: %s %s", resp.status, error)
@@ -106,14 +152,15 @@ class JetHomeCloudConversationAgent(AbstractConversationAgent):
                     response.async_set_speech("Sorry, I couldn't process your request.")
                     return ConversationResult(response=response)
 
-                data = await resp.json()
+                data = await resp.json(loads=json_loads)
 
             # Handle the response
-            choice = data.get("choices", [{}])[0]
-            message = choice.get("message", {})
+            message = _reply_message(data)
 
             # Execute tool calls if any
             tool_calls = message.get("tool_calls", [])
+            if not isinstance(tool_calls, list):
+                raise MalformedResponseError("Malformed tool calls in chat completion reply")
             if tool_calls:
                 await self._execute_tool_calls(tool_calls)
 
@@ -123,51 +170,67 @@ class JetHomeCloudConversationAgent(AbstractConversationAgent):
             response.async_set_speech(response_text)
             return ConversationResult(response=response)
 
-        except Exception as exc:
+        except (aiohttp.ClientError, TimeoutError, ValueError) as exc:
             _LOGGER.error("Conversation error: %s", exc)
             response = intent.IntentResponse(language=user_input.language)
             response.async_set_speech("An error occurred while processing your request.")
             return ConversationResult(response=response)
 
-    def _get_exposed_entities(self) -> list[dict[str, Any]]:
-        """Get entities exposed to voice assistants."""
-        entities = []
+    @callback
+    def async_state_changed(self, event: Event) -> None:
+        """Drop the cached prompt if the changed entity can affect it."""
+        entity_id = event.data["entity_id"]
+        if entity_id in self._entity_lines:
+            del self._entity_lines[entity_id]
+            self._cached_prompt = None
+        elif event.data["old_state"] is None or event.data["new_state"] is None:
+            # Added or removed entities may move into or out of the prompt
+            self._cached_prompt = None
+
+    @callback
+    def async_invalidate_prompt(self, event: Event | None = None) -> None:
+        """Drop the cached system prompt, it is rebuilt on the next turn."""
+        self._cached_prompt = None
+
+    def _get_system_prompt(self) -> str:
+        """Return the system prompt, building it only if states changed."""
+        if self._cached_prompt is None:
+            self._cached_prompt = self._render_prompt()
+        return self._cached_prompt
+
+    def _render_prompt(self) -> str:
+        """Build system prompt with the entities exposed to voice assistants."""
+        cached_lines = self._entity_lines
+        # Only entities in this prompt are kept, see async_state_changed
+        prompt_lines: dict[str, str] = {}
+        lines: list[str] = []
         for state in self.hass.states.async_all():
-            entities.append(
-                {
-                    "entity_id": state.entity_id,
-                    "friendly_name": state.attributes.get("friendly_name", ""),
-                    "state": state.state,
-                    "domain": state.domain,
-                }
-            )
-        # Limit to first 100 entities to keep prompt size manageable
-        return entities[:100]
-
-    def _build_system_prompt(self, entities: list[dict[str, Any]]) -> str:
-        """Build system prompt with device context."""
-        devices_text = "\n".join(f"- {e['entity_id']}: {e['friendly_name']} (state: {e['state']})" for e in entities)
-        return (
-            "You are a helpful smart home assistant powered by JetAssist.\n"
-            "You help the user control their Home Assistant devices.\n\n"
-            f"Available devices:\n{devices_text}\n\n"
-            "When controlling devices, use the call_ha_service function.\n"
-            "Respond in the user's language. Be concise."
-        )
-
-    async def _execute_tool_calls(self, tool_calls: list[dict]) -> None:
+            if not async_should_expose(self.hass, CONVERSATION_DOMAIN, state.entity_id):
+                continue
+            line = cached_lines.get(state.entity_id)
+            if line is None:
+                line = f"- {state.entity_id}: {state.attributes.get('friendly_name', '')} (state: {state.state})"
+            prompt_lines[state.entity_id] = line
+            lines.append(line)
+            # Limit to first 100 entities to keep prompt size manageable
+            if len(lines) == 100:
+                break
+        self._entity_lines = prompt_lines
+        return self._PROMPT_PREFIX + "\n".join(lines) + self._PROMPT_SUFFIX
+
+    async def _execute_tool_calls(self, tool_calls: list[Any]) -> None:
         """Execute HA service calls from LLM function calls."""
         for call in tool_calls:
-            func = call.get("function", {})
-            if func.get("name") == "call_ha_service":
+            func = call.get("function") if isinstance(call, dict) else None
+            if isinstance(func, dict) and func.get("name") == "call_ha_service":
                 try:
-                    args = json.loads(func.get("arguments", "{}"))
+                    args = _SERVICE_CALL_SCHEMA(json_loads(func.get("arguments", "{}")))
                     await self.hass.services.async_call(
                         domain=args["domain"],
                         service=args["service"],
                         service_data={
                             "entity_id": args["entity_id"],
-                            **args.get("data", {}),
+                            **args["data"],
                         },
                     )
                     _LOGGER.info(
@@ -176,5 +239,5 @@ class JetHomeCloudConversationAgent(AbstractConversationAgent):
                         args["service"],
                         args["entity_id"],
                     )
-                except Exception as exc:
+                except (HomeAssistantError, vol.Invalid, ValueError) as exc:
                     _LOGGER.error("Service call failed: %s", exc)
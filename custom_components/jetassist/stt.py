@@ -6,9 +6,11 @@ Proxies audio to the JetAssist STT API.
 
 from __future__ import annotations
 
+from collections.abc import AsyncIterable
 import logging
 from typing import Any
 
+import aiohttp
 from homeassistant.components.stt import (
     AudioBitRates,
     AudioChannels,
@@ -23,7 +25,9 @@ from homeassistant.components.stt import (
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.util.json import json_loads
 
+from .api import MalformedResponseError
 from .const import DOMAIN
 
 _LOGGER = logging.getLogger(__name__)
@@ -96,36 +100,34 @@ class JetHomeCloudSTT(SpeechToTextEntity):
         """Return supported channels."""
         return [AudioChannels.CHANNEL_MONO]
 
-    async def async_process_audio_stream(self, metadata: SpeechMetadata, stream) -> SpeechResult:
+    async def async_process_audio_stream(self, metadata: SpeechMetadata, stream: AsyncIterable[bytes]) -> SpeechResult:
         """Process audio stream and return transcription."""
-        audio_data = b""
-        async for chunk in stream:
-            audio_data += chunk
+        # Stream the audio to the cloud as it arrives instead of buffering it
+        with aiohttp.MultipartWriter("form-data") as form:
+            part = form.append(stream)
+            part.set_content_disposition("form-data", name="file", filename="file")
 
         try:
             # POST to cloud STT API
-            import aiohttp
-
-            async with (
-                aiohttp.ClientSession() as session,
-                session.post(
-                    f"{self._api.endpoint}/api/v1/stt/transcribe",
-                    headers=self._api._headers,
-                    params={
-                        "language": metadata.language,
-                        "provider": "openai",  # default; configurable later
-                    },
-                    data={"file": audio_data},
-                ) as resp,
-            ):
+            async with self._api.session.post(
+                f"{self._api.endpoint}/api/v1/stt/transcribe",
+                headers=self._api._headers,
+                params={
+                    "language": metadata.language,
+                    "provider": "openai",  # default; configurable later
+                },
+                data=form,
+            ) as resp:
                 if resp.status == 200:
-                    data = await resp.json()
+                    data = await resp.json(loads=json_loads)
+                    if not isinstance(data, dict) or not isinstance(text := data.get("text", ""), str):
+                        raise MalformedResponseError("Malformed STT response")
                     return SpeechResult(
-                        text=data.get("text", ""),
+                        text=text,
                         result=SpeechResultState.SUCCESS,
                     )
                 _LOGGER.error("STT API error: %s", resp.status)
                 return SpeechResult(text="", result=SpeechResultState.ERROR)
-        except Exception as exc:
+        except (aiohttp.ClientError, TimeoutError, ValueError) as exc:
             _LOGGER.error("STT processing error: %s", exc)
             return SpeechResult(text="", result=SpeechResultState.ERROR)
@@ -9,6 +9,7 @@ from __future__ import annotations
 import logging
 from typing import Any
 
+import aiohttp
 from homeassistant.components.tts import TextToSpeechEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
@@ -69,25 +70,20 @@ class JetHomeCloudTTS(TextToSpeechEntity):
     async def async_get_tts_audio(self, message: str, language: str, options: dict | None = None) -> tuple[str, bytes]:
         """Get TTS audio from JetAssist."""
         try:
-            import aiohttp
-
-            async with (
-                aiohttp.ClientSession() as session,
-                session.post(
-                    f"{self._api.endpoint}/api/v1/tts/synthesize",
-                    headers=self._api._headers,
-                    json={
-                        "text": message,
-                        "language": language,
-                        "voice": (options or {}).get("voice", "default"),
-                    },
-                ) as resp,
-            ):
+            async with self._api.session.post(
+                f"{self._api.endpoint}/api/v1/tts/synthesize",
+                headers=self._api._headers,
+                json={
+                    "text": message,
+                    "language": language,
+                    "voice": (options or {}).get("voice", "default"),
+                },
+            ) as resp:
                 if resp.status == 200:
                     audio = await resp.read()
                     return ("wav", audio)
                 _LOGGER.error("TTS API error: %s", resp.status)
                 return ("wav", b"")
-        except Exception as exc:
+        except (aiohttp.ClientError, TimeoutError) as exc:
             _LOGGER.error("TTS processing error: %s", exc)
             return ("wav", b"")
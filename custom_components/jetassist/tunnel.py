@@ -8,18 +8,29 @@ connections from the server to localhost:8123 (HA).
 from __future__ import annotations
 
 import asyncio
+from collections.abc import Awaitable, Callable
 from enum import IntEnum
+from functools import partial
 import logging
 import struct
+from typing import Any
 
 import aiohttp
 
 _LOGGER = logging.getLogger(__name__)
 
-# Protocol constants (must match services/tunnel/protocol.py)
-HEADER_SIZE = 22
+# Protocol constants (must match services/tunnel/protocol.py):
+# channel id, flag, payload size and a reserved byte, always 0
 HEADER_FORMAT = "!16sBIB"
 
+# Precompiled header codec, avoids re-parsing a format per frame. Same
+# layout as HEADER_FORMAT with the channel id read as two uint64 halves:
+# the high half keys the channel map, an int hashes far cheaper than bytes
+_HEADER = struct.Struct("!QQBIB")
+HEADER_SIZE = _HEADER.size
+if struct.calcsize(HEADER_FORMAT) != HEADER_SIZE:
+    raise RuntimeError("Tunnel header codec does not match HEADER_FORMAT")
+
 
 class Flag(IntEnum):
     """Multiplexer frame flags."""
@@ -33,6 +44,44 @@ class Flag(IntEnum):
     RESUME = 0x32
 
 
+# Plain int flags for the per-frame paths, skipping the enum member lookup
+FLAG_NEW = int(Flag.NEW)
+FLAG_DATA = int(Flag.DATA)
+FLAG_CLOSE = int(Flag.CLOSE)
+FLAG_PING = int(Flag.PING)
+FLAG_PONG = int(Flag.PONG)
+FLAG_PAUSE = int(Flag.PAUSE)
+FLAG_RESUME = int(Flag.RESUME)
+
+# Keepalive reply, the same bytes every time
+_PONG_FRAME = _HEADER.pack(0, 0, FLAG_PONG, 0, 0)
+
+# Per-channel buffering towards local HA before the channel writer waits
+# for a drain
+LOCAL_WRITE_BUFFER_HIGH = 64 * 1024
+
+# Tunnel data queued for a local connection that is not reading before the
+# channel is dropped; the receive loop itself never waits on a channel
+LOCAL_WRITE_QUEUE_MAX = 16 * 1024 * 1024
+
+# Outbound frames queued for the sender before _send_frame waits, and the
+# largest WebSocket message the sender builds from queued frames when the
+# server accepts several frames per message (pipeline_frames)
+SEND_QUEUE_HIGH = 32
+SEND_BATCH_MAX = 256 * 1024
+
+# Largest inbound WebSocket message accepted, leaves room for pipelined
+# frames above aiohttp's 4 MiB default while keeping the size field (a
+# uint32) from making HA buffer gigabytes for a single message
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+# Bytes read from local HA per DATA frame
+LOCAL_READ_SIZE = 64 * 1024
+
+# Queued outbound frame: channel id halves, flag, payload
+_OutFrame = tuple[int, int, int, bytes]
+
+
 class TunnelClient:
     """WebSocket tunnel client running inside HA integration.
 
@@ -46,17 +95,41 @@ class TunnelClient:
         token: str,
         local_port: int = 8123,
         local_host: str = "127.0.0.1",
+        pipeline_frames: bool = False,
     ) -> None:
         self.server_url = server_url
         self.token = token
         self.local_host = local_host
         self.local_port = local_port
-        self._channels: dict[bytes, _ChannelHandler] = {}
+        # Pack several outbound frames into one WebSocket message; only for
+        # servers that split messages by the header size field
+        self.pipeline_frames = pipeline_frames
+        # High half of the channel id -> handler, see _HEADER
+        self._channels: dict[int, _ChannelHandler] = {}
+        # Channels whose high half is already taken in _channels, by full id
+        self._overflow: dict[tuple[int, int], _ChannelHandler] = {}
+        # Running read_from_local (and ws close) tasks, referenced so they
+        # are not collected
+        self._tasks: set[asyncio.Task[Any]] = set()
         self._ws: aiohttp.ClientWebSocketResponse | None = None
         self._session: aiohttp.ClientSession | None = None
+        self._send_queue: asyncio.Queue[_OutFrame] = asyncio.Queue()
+        self._send_writable = asyncio.Event()
+        # True while connected and the sender is running
+        self._alive = False
         self._reconnect_delay = 1.0
         self._running = False
         self._task: asyncio.Task | None = None  # type: ignore[type-arg]
+        # Raw flag byte -> frame handler, a single dict lookup per frame
+        self._dispatch: dict[int, Callable[[int, int, memoryview], Awaitable[None]]] = {
+            FLAG_NEW: self._open_channel,
+            FLAG_DATA: self._on_data,
+            FLAG_CLOSE: self._on_close,
+            FLAG_PING: self._on_ping,
+            FLAG_PONG: self._on_pong,
+            FLAG_PAUSE: self._on_pause,
+            FLAG_RESUME: self._on_resume,
+        }
 
     async def connect(self) -> None:
         """Start the persistent connection loop."""
@@ -78,11 +151,17 @@ class TunnelClient:
 
     async def _connect_once(self) -> None:
         """Establish a single WebSocket connection."""
-        self._session = aiohttp.ClientSession()
+        if self._session is None or self._session.closed:
+            # Kept across reconnects, closed in stop()
+            self._session = aiohttp.ClientSession()
+        sender: asyncio.Task[None] | None = None
         try:
             self._ws = await self._session.ws_connect(
                 self.server_url,
                 heartbeat=30,
+                # Tunnel payloads are opaque bytes, mostly already compressed
+                compress=0,
+                max_msg_size=MAX_MESSAGE_SIZE,
             )
             # Authenticate: send JWT as first message
             await self._ws.send_str(self.token)
@@ -90,6 +169,12 @@ class TunnelClient:
             self._reconnect_delay = 1.0
             _LOGGER.info("Tunnel connected to %s", self.server_url)
 
+            self._send_queue = asyncio.Queue()
+            self._send_writable.set()
+            sender = asyncio.create_task(self._send_loop(self._ws, self._send_queue))
+            sender.add_done_callback(partial(self._on_sender_done, self._ws))
+            self._alive = True
+
             # Main message loop
             async for msg in self._ws:
                 if msg.type == aiohttp.WSMsgType.BINARY:
@@ -98,59 +183,105 @@ class TunnelClient:
                     _LOGGER.error("WebSocket error: %s", self._ws.exception())
                     break
         finally:
-            # Cleanup channels
-            for handler in list(self._channels.values()):
-                handler.close()
-            self._channels.clear()
+            self._alive = False
+            self._close_channels()
+
+            if sender is not None:
+                sender.cancel()
+                # Release channels waiting for queue space, they see the
+                # closed channel and stop
+                self._send_writable.set()
+                # Its exception, if any, was logged by _on_sender_done
+                await asyncio.gather(sender, return_exceptions=True)
 
             if self._ws and not self._ws.closed:
                 await self._ws.close()
-            if self._session and not self._session.closed:
-                await self._session.close()
             self._ws = None
-            self._session = None
 
     async def _handle_frame(self, data: bytes) -> None:
-        """Parse and handle an incoming binary frame."""
-        if len(data) < HEADER_SIZE:
-            return
+        """Parse and handle the frames in an incoming binary message."""
+        # The server may pipeline several frames into one message
+        view = memoryview(data)
+        total = len(view)
+        unpack_from = _HEADER.unpack_from
+        channels = self._channels
+        offset = 0
+        while offset + HEADER_SIZE <= total:
+            cid_hi, cid_lo, flag_val, size, _reserved = unpack_from(view, offset)
+            start = offset + HEADER_SIZE
+            offset = start + size
+            # Zero-copy view of the payload; StreamWriter.write accepts it as is
+            payload = view[start:offset]
+            if flag_val == FLAG_DATA:
+                # Nearly all traffic, skip the dispatch table
+                handler = channels.get(cid_hi)
+                if handler is None or handler.cid_lo != cid_lo:
+                    handler = self._overflow.get((cid_hi, cid_lo)) if self._overflow else None
+                if handler:
+                    handler.feed_data(payload)
+                continue
+            on_frame = self._dispatch.get(flag_val)
+            if on_frame is None:
+                _LOGGER.warning("Unknown flag: 0x%02x", flag_val)
+                continue
+            await on_frame(cid_hi, cid_lo, payload)
+
+    def _get_channel(self, cid_hi: int, cid_lo: int) -> _ChannelHandler | None:
+        """Return the handler for a channel id, if open."""
+        handler = self._channels.get(cid_hi)
+        if handler and handler.cid_lo == cid_lo:
+            return handler
+        if self._overflow:
+            return self._overflow.get((cid_hi, cid_lo))
+        return None
+
+    def _remove_channel(self, handler: _ChannelHandler) -> None:
+        """Forget a channel, from whichever map holds it."""
+        if self._channels.get(handler.cid_hi) is handler:
+            del self._channels[handler.cid_hi]
+        else:
+            self._overflow.pop((handler.cid_hi, handler.cid_lo), None)
+
+    def _close_channels(self) -> None:
+        """Close and forget all channels."""
+        for handler in [*self._channels.values(), *self._overflow.values()]:
+            handler.close()
+        self._channels.clear()
+        self._overflow.clear()
+
+    async def _on_data(self, cid_hi: int, cid_lo: int, payload: memoryview) -> None:
+        """Forward a DATA frame to the local connection."""
+        handler = self._get_channel(cid_hi, cid_lo)
+        if handler:
+            handler.feed_data(payload)
+
+    async def _on_close(self, cid_hi: int, cid_lo: int, payload: memoryview) -> None:
+        """Close a channel on a CLOSE frame."""
+        handler = self._get_channel(cid_hi, cid_lo)
+        if handler:
+            self._remove_channel(handler)
+            handler.close()
 
-        channel_id, flag_val, size, _extra = struct.unpack(HEADER_FORMAT, data[:HEADER_SIZE])
-        payload = data[HEADER_SIZE : HEADER_SIZE + size]
+    async def _on_ping(self, cid_hi: int, cid_lo: int, payload: memoryview) -> None:
+        """Answer a PING frame."""
+        await self._send_pong()
 
-        try:
-            flag = Flag(flag_val)
-        except ValueError:
-            _LOGGER.warning("Unknown flag: 0x%02x", flag_val)
-            return
+    async def _on_pong(self, cid_hi: int, cid_lo: int, payload: memoryview) -> None:
+        """Ignore a PONG frame."""
 
-        if flag == Flag.PING:
-            await self._send_pong()
-            return
+    async def _on_pause(self, cid_hi: int, cid_lo: int, payload: memoryview) -> None:
+        """Pause a channel on a PAUSE frame."""
+        handler = self._get_channel(cid_hi, cid_lo)
+        if handler:
+            handler.pause()
 
-        if flag == Flag.PONG:
-            return
+    async def _on_resume(self, cid_hi: int, cid_lo: int, payload: memoryview) -> None:
+        """Resume a channel on a RESUME frame."""
+        handler = self._get_channel(cid_hi, cid_lo)
+        if handler:
+            handler.resume()
 
-        if flag == Flag.NEW:
-            await self._open_channel(channel_id, payload)
-        elif flag == Flag.DATA:
-            handler = self._channels.get(channel_id)
-            if handler:
-                handler.feed_data(payload)
-        elif flag == Flag.CLOSE:
-            handler = self._channels.pop(channel_id, None)
-            if handler:
-                handler.close()
-        elif flag == Flag.PAUSE:
-            handler = self._channels.get(channel_id)
-            if handler:
-                handler.pause()
-        elif flag == Flag.RESUME:
-            handler = self._channels.get(channel_id)
-            if handler:
-                handler.resume()
-
-    async def _open_channel(self, channel_id: bytes, payload: bytes) -> None:
+    async def _open_channel(self, cid_hi: int, cid_lo: int, payload: memoryview) -> None:
         """Open a new local TCP connection for a channel."""
         try:
             reader, writer = await asyncio.open_connection(self.local_host, self.local_port)
@@ -161,36 +292,108 @@ class TunnelClient:
                 self.local_port,
                 exc,
             )
-            await self._send_close(channel_id)
+            await self._send_close(cid_hi, cid_lo)
             return
 
-        handler = _ChannelHandler(channel_id, reader, writer, self)
-        self._channels[channel_id] = handler
-        asyncio.create_task(handler.read_from_local())
-
-    async def _send_frame(self, channel_id: bytes, flag: Flag, payload: bytes = b"") -> None:
+        handler = _ChannelHandler(cid_hi, cid_lo, reader, writer, self)
+        existing = self._channels.get(cid_hi)
+        if existing and existing.cid_lo != cid_lo:
+            # Ids need not be random in their high half (time-ordered ids,
+            # counters), keep the second channel by its full id
+            self._overflow[(cid_hi, cid_lo)] = handler
+        else:
+            self._channels[cid_hi] = handler
+        task = asyncio.create_task(handler.read_from_local())
+        handler.task = task
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        writer_task = asyncio.create_task(handler.write_to_local())
+        self._tasks.add(writer_task)
+        writer_task.add_done_callback(self._tasks.discard)
+
+    async def _send_frame(self, cid_hi: int, cid_lo: int, flag: int, payload: bytes = b"") -> None:
         """Send a frame to the tunnel server."""
-        if self._ws is None or self._ws.closed:
+        if not self._alive:
             return
-        header = struct.pack(HEADER_FORMAT, channel_id, flag, len(payload), 0)
-        await self._ws.send_bytes(header + payload)
-
-    async def _send_close(self, channel_id: bytes) -> None:
+        queue = self._send_queue
+        # Packed by the sender straight into its outbound buffer
+        queue.put_nowait((cid_hi, cid_lo, flag, payload))
+        if queue.qsize() >= SEND_QUEUE_HIGH:
+            # Backpressure: wait until the sender has caught up
+            self._send_writable.clear()
+            await self._send_writable.wait()
+
+    async def _send_loop(self, ws: aiohttp.ClientWebSocketResponse, queue: asyncio.Queue[_OutFrame]) -> None:
+        """Send queued frames, one per message unless pipeline_frames is set."""
+        send_bytes = ws.send_bytes
+        pack_into = _HEADER.pack_into
+        # With batch_max 0 every message carries exactly one frame
+        batch_max = SEND_BATCH_MAX if self.pipeline_frames else 0
+        # Reused for every message on this connection, sized for a full
+        # batch plus one more maximum-size local read
+        buf = bytearray(batch_max + HEADER_SIZE + LOCAL_READ_SIZE)
+        try:
+            while True:
+                frame = await queue.get()
+                end = 0
+                while True:
+                    cid_hi, cid_lo, flag, payload = frame
+                    size = len(payload)
+                    start = end + HEADER_SIZE
+                    if start + size > len(buf):
+                        buf.extend(bytes(start + size - len(buf)))
+                    pack_into(buf, end, cid_hi, cid_lo, flag, size, 0)
+                    end = start + size
+                    buf[start:end] = payload
+                    if queue.empty() or end >= batch_max:
+                        break
+                    frame = queue.get_nowait()
+                if queue.qsize() < SEND_QUEUE_HIGH:
+                    self._send_writable.set()
+                # The transport may keep a reference to what it is handed,
+                # so send a copy and keep buf free for the next message
+                await send_bytes(bytes(memoryview(buf)[:end]))
+        except (aiohttp.ClientError, ConnectionError) as exc:
+            _LOGGER.warning("Tunnel send failed: %s", exc)
+
+    def _on_sender_done(self, ws: aiohttp.ClientWebSocketResponse, task: asyncio.Task[None]) -> None:
+        """Take the connection down when its sender stops on its own."""
+        if task.cancelled():
+            return
+        if (exc := task.exception()) is not None:
+            _LOGGER.error("Tunnel sender failed", exc_info=exc)
+        if self._ws is ws:
+            self._alive = False
+            # Wake channels waiting for queue space, nothing drains it now
+            self._send_writable.set()
+        if not ws.closed:
+            # Ends the receive loop in _connect_once, which reconnects
+            close = asyncio.create_task(ws.close())
+            self._tasks.add(close)
+            close.add_done_callback(self._tasks.discard)
+
+    async def _send_close(self, cid_hi: int, cid_lo: int) -> None:
         """Send a CLOSE frame."""
-        await self._send_frame(channel_id, Flag.CLOSE)
+        await self._send_frame(cid_hi, cid_lo, FLAG_CLOSE)
 
     async def _send_pong(self) -> None:
         """Send a PONG frame."""
-        await self._send_frame(b"\x00" * 16, Flag.PONG)
+        # Not queued behind channel data, a complete frame on its own
+        if self._alive and self._ws is not None:
+            await self._ws.send_bytes(_PONG_FRAME)
 
     async def stop(self) -> None:
         """Stop the tunnel client."""
         self._running = False
         if self._ws and not self._ws.closed:
             await self._ws.close()
-        for handler in list(self._channels.values()):
-            handler.close()
-        self._channels.clear()
+        self._close_channels()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
 
 
 class _ChannelHandler:
@@ -198,52 +401,102 @@ class _ChannelHandler:
 
     def __init__(
         self,
-        channel_id: bytes,
+        cid_hi: int,
+        cid_lo: int,
         reader: asyncio.StreamReader,
         writer: asyncio.StreamWriter,
         client: TunnelClient,
     ) -> None:
-        self.channel_id = channel_id
+        self.cid_hi = cid_hi
+        self.cid_lo = cid_lo
         self._reader = reader
         self._writer = writer
+        self._writer.transport.set_write_buffer_limits(high=LOCAL_WRITE_BUFFER_HIGH)
         self._client = client
         self._closed = False
-        self._paused = False
-
-    def feed_data(self, data: bytes) -> None:
-        """Write data from tunnel to local HA connection."""
+        self.task: asyncio.Task[None] | None = None
+        # Cleared while the server has the channel paused
+        self._resumed = asyncio.Event()
+        self._resumed.set()
+        # Tunnel data for write_to_local, None once the channel is closed
+        self._write_queue: asyncio.Queue[memoryview | None] = asyncio.Queue()
+        self._write_queued = 0
+
+    def feed_data(self, data: memoryview) -> None:
+        """Queue data from tunnel for the local HA connection."""
         if self._closed:
             return
-        self._writer.write(data)
+        self._write_queued += len(data)
+        if self._write_queued > LOCAL_WRITE_QUEUE_MAX:
+            _LOGGER.warning("Local connection is not reading, closing its channel")
+            # Later frames find no channel; the writer task fails its drain
+            # and read_from_local sends CLOSE
+            self._client._remove_channel(self)
+            self._writer.transport.abort()
+            if self.task:
+                self.task.cancel()
+            return
+        self._write_queue.put_nowait(data)
+
+    async def write_to_local(self) -> None:
+        """Write queued tunnel data to local HA, waiting for drains here only."""
+        queue = self._write_queue
+        write = self._writer.write
+        drain = self._writer.drain
+        try:
+            while (data := await queue.get()) is not None:
+                self._write_queued -= len(data)
+                write(data)
+                # Returns at once unless the local side is not keeping up
+                await drain()
+        except OSError:
+            # Local connection is gone; read_from_local closes the channel
+            pass
+        finally:
+            # Data queued before close() has been written by now
+            if not self._writer.is_closing():
+                self._writer.close()
 
     async def read_from_local(self) -> None:
         """Read data from local HA and send to tunnel."""
+        cid_hi = self.cid_hi
+        cid_lo = self.cid_lo
+        read = self._reader.read
+        send_frame = self._client._send_frame
+        resumed = self._resumed
         try:
             while not self._closed:
-                data = await self._reader.read(4096)
+                if not resumed.is_set():
+                    # Not reading lets the StreamReader buffer fill up, at
+                    # which point it pauses the local socket itself
+                    await resumed.wait()
+                    continue
+                data = await read(LOCAL_READ_SIZE)
                 if not data:
                     break
-                await self._client._send_frame(self.channel_id, Flag.DATA, data)
+                await send_frame(cid_hi, cid_lo, FLAG_DATA, data)
         except (OSError, asyncio.CancelledError):
             pass
         finally:
             if not self._closed:
-                await self._client._send_close(self.channel_id)
-                self._client._channels.pop(self.channel_id, None)
+                await self._client._send_close(cid_hi, cid_lo)
+                self._client._remove_channel(self)
             self.close()
 
     def pause(self) -> None:
         """Pause reading from local (flow control)."""
-        self._paused = True
+        self._resumed.clear()
 
     def resume(self) -> None:
         """Resume reading from local."""
-        self._paused = False
+        self._resumed.set()
 
     def close(self) -> None:
         """Close the local connection."""
         if self._closed:
             return
         self._closed = True
-        if not self._writer.is_closing():
-            self._writer.close()
+        # Wake a paused reader so it can exit
+        self._resumed.set()
+        # write_to_local closes the writer after the data queued so far
+        self._write_queue.put_nowait(None)